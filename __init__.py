@@ -7,20 +7,53 @@
 # - _SEED_* strings in Python are only used once at first run, then ignored
 
 import os
+import io
 import json
+import threading
+import http.client
+import urllib.parse
 import urllib.request
 import urllib.error
+import stat
 import base64
+import gzip
+import zlib
 import re
+import sys
+import time
+import random
 import traceback
 from typing import Optional, List, Tuple, Dict
-import copy
+import concurrent.futures
+import functools
+from contextlib import contextmanager
 
 from aqt import mw
 from aqt.utils import showInfo, showWarning, askUser, tooltip, getText
 from aqt.qt import *
 from anki.notes import Note
 
+try:
+    # Batch insert (one backend transaction per call) — newer Anki only
+    from anki.collection import AddNoteRequest
+except ImportError:
+    AddNoteRequest = None
+
+# Anki ships orjson; it parses straight from bytes and emits bytes, skipping the
+# decode()/encode() round trip. Fall back to the stdlib if it is ever missing.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_loads(data: bytes):
+    return orjson.loads(data) if orjson else json.loads(data.decode("utf-8"))
+
+
+def _json_dumps(obj) -> bytes:
+    return orjson.dumps(obj) if orjson else json.dumps(obj).encode("utf-8")
+
 # ============================================================================
 # CONSTANTS
 # ============================================================================
@@ -29,14 +62,47 @@ ADDON_NAME = "Anki MCQ Importer - AI Batch Generator"
 VERSION = "4.1.0"
 DEFAULT_GITHUB_REPO = "anki-boi/True-Anki-MCQ-Note-Template"
 NOTE_TYPE_DOWNLOAD_URL = "https://github.com/anki-boi/True-Anki-MCQ-Note-Template/releases/latest"
-SUPPORTED_IMAGE_FORMATS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp')
+SUPPORTED_IMAGE_FORMATS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp'})
+_SUPPORTED_IMAGE_DISPLAY = tuple(sorted(SUPPORTED_IMAGE_FORMATS))  # stable order for messages
 MAX_FILE_SIZE_MB = 20
+# Leading bytes of each supported format; WEBP also needs "WEBP" at offset 8
+_IMAGE_MAGIC = (b"\x89PNG\r\n\x1a\n", b"\xff\xd8\xff", b"GIF87a", b"GIF89a", b"BM")
+VALIDATE_WORKERS = 8
+DEFAULT_IMAGE_MAX_EDGE = 1600  # px; larger images are downscaled before upload (0 = off)
+JPEG_UPLOAD_QUALITY = 85
+REENCODE_MIN_BYTES = 1024 * 1024  # files this big are re-encoded as JPEG even if they fit
+PROGRESS_LOG_MAX_LINES = 500  # import progress log keeps the most recent lines only
+# Whole-key check in one pass: "AIzaSy" prefix, ≥30 chars, URL-safe charset
+_API_KEY_RE = re.compile(r"AIzaSy[A-Za-z0-9_-]{24,}")
+MODELS_PAGE_SIZE = 1000   # models.list maximum page size
+GEMINI_MAX_IN_FLIGHT = 5  # default concurrent generateContent requests during an import
+GEMINI_MAX_ATTEMPTS = 5   # tries per image for transient (rate-limit / server / network) errors
+RETRY_BASE_DELAY = 2.0    # seconds; doubles on each retry
+RETRY_MAX_DELAY = 60.0
+RETRY_JITTER = 1.0        # seconds of random spread, so parallel workers don't retry in lockstep
+_RETRYABLE_HTTP_CODES = frozenset({429, 500, 502, 503, 504})
+# Substrings of get_gemini_response errors that mean the key itself is bad: stop the import
+_FATAL_API_ERRORS = ("(401)", "(403)", "invalid")
+# Client-side pacing for generateContent, per model family (substring of the
+# model name; "default" otherwise). Matches the free-tier quotas; 0 disables.
+DEFAULT_REQUESTS_PER_MINUTE = {"pro": 5, "default": 10}
+_RETRY_DELAY_RE = re.compile(r'"retryDelay":\s*"(\d+(?:\.\d+)?)s"')
+_DIGIT_RUN_RE = re.compile(r"(\d+)")           # natural sort of image file names
+_LABEL_WORD_SEP_RE = re.compile(r"[\s/()]+")   # slot label → fuzzy-match keywords
+# Fixed request body for test_api_connection — never varies, so never re-serialised
+_PING_BODY = b'{"contents":[{"parts":[{"text":"Hello"}]}]}'
 GEMINI_MODELS = [
     "gemini-2.5-flash-preview-05-20",
     "gemini-2.5-pro-preview-06-05",
     "gemini-2.0-flash",
     "gemini-2.0-pro",
 ]
+# Fallback order when the configured model isn't offered by the API
+_PREFERRED_MODELS = (
+    "gemini-2.5-flash-preview-05-20",
+    "gemini-2.5-pro-preview-06-05",
+    "gemini-2.0-flash",
+)
 
 # Logical field slot identifiers (never exposed as Anki field names directly)
 SLOT_QUESTION = "question"   # MCQ: Question stem  | Basic: Front
@@ -45,6 +111,9 @@ SLOT_ANSWER   = "answer"     # MCQ: Correct Answers | Basic: Back
 SLOT_TEXT     = "text"       # Cloze: sentence with {{c1::}} syntax
 SLOT_EXTRA    = "extra"      # All: rationale / mnemonics / image tag
 
+# Human-readable card format names shown in the settings dialog
+_FMT_LABELS = {"mcq": "Multiple Choice (MCQ)", "cloze": "Cloze Deletion", "basic": "Basic (Front/Back)"}
+
 # Slot metadata for the field-mapping UI, keyed by format string
 SLOT_META = {
     "mcq": [
@@ -332,6 +401,10 @@ _DEFAULT_PROFILE_SCHEMA = {
     },
 }
 
+# Bump whenever _DEFAULT_PROFILE_SCHEMA (or anything migrate_prompts_to_config
+# backfills) changes, so existing configs get migrated once on next startup.
+_CURRENT_SCHEMA_VERSION = 1
+
 # Keys whose prompts can be factory-reset; also protected from deletion
 BUILTIN_PROFILE_KEYS = set(_DEFAULT_PROFILE_SCHEMA.keys())
 
@@ -347,11 +420,25 @@ _SEED_PROMPTS = {
 # CONFIG MIGRATION / SEEDING
 # ============================================================================
 
-def get_default_config() -> Dict:
-    """Build a brand-new default config with prompts already seeded."""
+def _clone_profile_schema(schema: Dict) -> Dict:
+    """Copy a built-in schema entry; its only nested value is the flat field_map."""
+    return {"display_name": schema["display_name"],
+            "format":       schema["format"],
+            "field_map":    dict(schema["field_map"])}
+
+
+def _copy_profile(profile: Dict) -> Dict:
+    """Independent copy of a stored profile: strings are immutable, so only field_map needs copying."""
+    p = dict(profile)
+    if isinstance(p.get("field_map"), dict):
+        p["field_map"] = dict(p["field_map"])
+    return p
+
+
+def _build_default_config() -> Dict:
     profiles = {}
     for key, schema in _DEFAULT_PROFILE_SCHEMA.items():
-        p = copy.deepcopy(schema)
+        p = _clone_profile_schema(schema)
         p["prompt"] = _SEED_PROMPTS[key]
         profiles[key] = p
     return {
@@ -363,9 +450,23 @@ def get_default_config() -> Dict:
         "auto_open_media": True,
         "batch_size": 10,
         "validate_api_on_startup": False,
+        "requests_per_minute": dict(DEFAULT_REQUESTS_PER_MINUTE),
+        "image_max_edge": DEFAULT_IMAGE_MAX_EDGE,
+        "gemini_concurrency": GEMINI_MAX_IN_FLIGHT,
+        "strict_image_validation": False,
+        "_schema_version": _CURRENT_SCHEMA_VERSION,
     }
 
 
+# Serialised once at import; each default config is a fresh decode of this blob
+_DEFAULT_CONFIG_BLOB = _json_dumps(_build_default_config())
+
+
+def get_default_config() -> Dict:
+    """Build a brand-new default config with prompts already seeded."""
+    return _json_loads(_DEFAULT_CONFIG_BLOB)
+
+
 def migrate_prompts_to_config(config: Dict) -> Tuple[Dict, bool]:
     """
     Non-destructive migration: ensure every built-in profile has a prompt.
@@ -376,44 +477,57 @@ def migrate_prompts_to_config(config: Dict) -> Tuple[Dict, bool]:
       - If a profile is missing "prompt" or it is empty → seed from _SEED_PROMPTS.
       - If a built-in profile key is absent from config entirely → create it.
       - Custom profiles are untouched in every case.
+      - Configs already stamped with _CURRENT_SCHEMA_VERSION are returned as-is;
+        the walk only runs on first install or after a schema bump.
 
     Returns (config, changed_flag).
     """
-    changed = False
+    if config.get("_schema_version") == _CURRENT_SCHEMA_VERSION:
+        return config, False
 
     if "profiles" not in config:
         config["profiles"] = {}
-        changed = True
 
     for key, schema in _DEFAULT_PROFILE_SCHEMA.items():
         if key not in config["profiles"]:
-            p = copy.deepcopy(schema)
+            p = _clone_profile_schema(schema)
             p["prompt"] = _SEED_PROMPTS[key]
             config["profiles"][key] = p
-            changed = True
         else:
             existing = config["profiles"][key]
             # Backfill any missing structural keys (non-destructive)
             for field, value in schema.items():
                 if field not in existing:
-                    existing[field] = copy.deepcopy(value)
-                    changed = True
+                    existing[field] = dict(value) if isinstance(value, dict) else value
             # Seed prompt only when absent or blank
             if not existing.get("prompt", "").strip():
                 existing["prompt"] = _SEED_PROMPTS[key]
-                changed = True
 
     if "active_profile" not in config:
         config["active_profile"] = "MCQ"
-        changed = True
 
-    return config, changed
+    # Reaching here means the version stamp (at least) changed, so always persist
+    config["_schema_version"] = _CURRENT_SCHEMA_VERSION
+    return config, True
 
 
 # ============================================================================
 # LOAD / INITIALISE CONFIG
 # ============================================================================
 
+def _intern_keys(obj):
+    """
+    Rebuild nested dicts with interned keys.
+
+    Key literals in this module are interned by the compiler, but keys decoded
+    from JSON are fresh strings, so every CONFIG/profile lookup falls back to a
+    full string compare. Interning once at load lets those lookups match by identity.
+    """
+    if isinstance(obj, dict):
+        return {sys.intern(k): _intern_keys(v) for k, v in obj.items()}
+    return obj
+
+
 CONFIG = mw.addonManager.getConfig(__name__)
 if CONFIG is None:
     CONFIG = get_default_config()
@@ -422,14 +536,100 @@ else:
     CONFIG, _dirty = migrate_prompts_to_config(CONFIG)
     if _dirty:
         mw.addonManager.writeConfig(__name__, CONFIG)
+CONFIG = _intern_keys(CONFIG)
+
+
+# ============================================================================
+# HTTP TRANSPORT
+# Keep-alive HTTPS connections reused across Gemini calls, so repeated requests
+# (one per image in a batch, model list pages) skip the TCP + TLS handshake. One
+# connection per (thread, host) — http.client connections are not thread-safe.
+# ============================================================================
+
+_http_local = threading.local()
+
+
+def _new_connection(host: str, timeout: float) -> http.client.HTTPSConnection:
+    # Honour HTTPS_PROXY / system proxy settings (and no_proxy) like urlopen does:
+    # connect to the proxy and CONNECT-tunnel through it to host
+    proxy = urllib.request.getproxies().get("https")
+    if not proxy or urllib.request.proxy_bypass(host):
+        return http.client.HTTPSConnection(host, timeout=timeout)
+    if "://" not in proxy:
+        proxy = f"http://{proxy}"
+    p = urllib.parse.urlsplit(proxy)
+    conn = http.client.HTTPSConnection(p.hostname, p.port or 80, timeout=timeout)
+    headers = {}
+    if p.username:
+        cred = f"{urllib.parse.unquote(p.username)}:{urllib.parse.unquote(p.password or '')}"
+        headers["Proxy-Authorization"] = "Basic " + base64.b64encode(cred.encode()).decode("ascii")
+    conn.set_tunnel(host, headers=headers)
+    return conn
+
+
+def _get_connection(host: str, timeout: float) -> http.client.HTTPSConnection:
+    conns = getattr(_http_local, "conns", None)
+    if conns is None:
+        conns = _http_local.conns = {}
+    conn = conns.get(host)
+    if conn is None:
+        conn = conns[host] = _new_connection(host, timeout)
+    conn.timeout = timeout
+    if conn.sock is not None:
+        conn.sock.settimeout(timeout)
+    return conn
+
+
+def _http_request(url: str, data: Optional[bytes] = None, timeout: float = 10) -> bytes:
+    """
+    GET (or POST when data is given) over a pooled connection and return the body.
+
+    Raises the same exceptions as urllib.request.urlopen so callers keep their
+    existing handling: HTTPError for 4xx/5xx (body readable via e.read()),
+    URLError for connection-level failures.
+    """
+    parts = urllib.parse.urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    method = "GET" if data is None else "POST"
+    # JSON compresses well; Google's APIs honour gzip for both models.list and generateContent
+    headers = {"Accept-Encoding": "gzip"}
+    if data is not None:
+        headers["Content-Type"] = "application/json"
+
+    for attempt in range(2):
+        conn = _get_connection(parts.netloc, timeout)
+        reused = conn.sock is not None
+        try:
+            conn.request(method, path, body=data, headers=headers)
+            resp = conn.getresponse()
+            body = resp.read()
+            if resp.getheader("Content-Encoding", "").lower() == "gzip":
+                body = gzip.decompress(body)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+            conn.close()
+            # The server may drop an idle keep-alive socket; retry once on a fresh one
+            if reused and attempt == 0:
+                continue
+            raise urllib.error.URLError(e)
+        except (OSError, EOFError, zlib.error, http.client.HTTPException) as e:
+            # EOFError / zlib.error: truncated or corrupt gzip body — transient, like a dropped read
+            conn.close()
+            raise urllib.error.URLError(e)
+        if resp.status >= 400:
+            raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, io.BytesIO(body))
+        return body
+    raise urllib.error.URLError("connection closed by server")
 
 
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
 
-def log_error(context: str, error: Exception) -> str:
-    msg = f"[{ADDON_NAME}] {context}\nError: {error}\n{traceback.format_exc()}"
+def log_error(context: str, error: Exception, *, with_traceback: bool = True) -> str:
+    msg = f"[{ADDON_NAME}] {context}\nError: {error}"
+    if with_traceback:
+        # Formatting the stack is the expensive part; per-item failures skip it
+        msg += f"\n{traceback.format_exc()}"
     print(msg)
     return msg
 
@@ -437,20 +637,20 @@ def log_error(context: str, error: Exception) -> str:
 def validate_api_key(api_key: str) -> Tuple[bool, str]:
     if not api_key or not api_key.strip():
         return False, "API key cannot be empty"
+    if _API_KEY_RE.fullmatch(api_key):
+        return True, "API key format looks valid"
+    # Rejected — work out which rule failed for the message
     if not api_key.startswith("AIzaSy"):
         return False, "Invalid API key format. Gemini API keys start with 'AIzaSy'"
     if len(api_key) < 30:
         return False, "API key appears too short. Please verify your key."
-    return True, "API key format looks valid"
+    return False, "API key contains invalid characters. Please verify your key."
 
 
 def test_api_connection(api_key: str, model: str) -> Tuple[bool, str]:
     url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}"
-    body = json.dumps({"contents": [{"parts": [{"text": "Hello"}]}]}).encode()
     try:
-        req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
-        with urllib.request.urlopen(req, timeout=10) as r:
-            result = json.loads(r.read().decode())
+        result = _json_loads(_http_request(url, _PING_BODY, timeout=10))
         return (True, "API connection successful") if "candidates" in result else (False, "Unexpected API response")
     except urllib.error.HTTPError as e:
         rb = e.read().decode("utf-8", errors="ignore")
@@ -465,21 +665,23 @@ def test_api_connection(api_key: str, model: str) -> Tuple[bool, str]:
 
 
 def list_generate_models(api_key: str) -> Tuple[bool, List[str], str]:
-    url = f"https://generativelanguage.googleapis.com/v1beta/models?key={api_key}"
-    models, next_url = [], url
+    # Page tokens are chained, so pages can't be fetched concurrently; ask for the
+    # largest page the API allows so the whole list normally arrives in one round trip.
+    url = f"https://generativelanguage.googleapis.com/v1beta/models?key={api_key}&pageSize={MODELS_PAGE_SIZE}"
+    models: List[str] = []
+    seen: set = set()
+    next_url = url
     try:
         while next_url:
-            with urllib.request.urlopen(urllib.request.Request(next_url), timeout=10) as r:
-                payload = json.loads(r.read().decode())
+            payload = _json_loads(_http_request(next_url, timeout=10))
             for m in payload.get("models", []):
                 if "generateContent" not in m.get("supportedGenerationMethods", []):
                     continue
                 clean = m.get("name", "").replace("models/", "")
-                if clean.startswith("gemini"):
-                    models.append(clean)
+                if clean.startswith("gemini") and clean not in seen:
+                    seen.add(clean); models.append(clean)
             token = payload.get("nextPageToken")
             next_url = f"{url}&pageToken={token}" if token else None
-        models = list(dict.fromkeys(models))
         if not models:
             return False, [], "No Gemini generateContent models returned by API."
         return True, models, f"Found {len(models)} Gemini model(s)."
@@ -496,156 +698,477 @@ def choose_model_from_list(api_key: str, preferred: Optional[str] = None) -> Tup
     ok, models, msg = list_generate_models(api_key)
     if not ok:
         return False, None, msg, []
-    if preferred and preferred in models:
+    models_set = set(models)
+    if preferred and preferred in models_set:
         return True, preferred, msg, models
-    for c in ["gemini-2.5-flash-preview-05-20", "gemini-2.5-pro-preview-06-05", "gemini-2.0-flash"]:
-        if c in models:
+    for c in _PREFERRED_MODELS:
+        if c in models_set:
             return True, c, msg, models
     return True, models[0], msg, models
 
 
-def validate_image_file(path: str) -> Tuple[bool, str]:
-    if not os.path.exists(path):    return False, f"File not found: {path}"
-    if not os.path.isfile(path):    return False, f"Not a file: {path}"
-    try:
-        mb = os.path.getsize(path) / (1024 * 1024)
-        if mb > MAX_FILE_SIZE_MB:   return False, f"Too large ({mb:.1f} MB). Max: {MAX_FILE_SIZE_MB} MB"
-    except Exception as e:          return False, f"Cannot read size: {e}"
+def _looks_like_image(head: bytes) -> bool:
+    return head.startswith(_IMAGE_MAGIC) or (head[:4] == b"RIFF" and head[8:12] == b"WEBP")
+
+
+def validate_image_file(path: str, strict: bool = False) -> Tuple[bool, str]:
+    # Extension first (no I/O), then one stat() for exists/is-file/size, then
+    # (strict only) 12 header bytes to confirm the content really is an image
     ext = os.path.splitext(path)[1].lower()
     if ext not in SUPPORTED_IMAGE_FORMATS:
-        return False, f"Unsupported: {ext}. Supported: {', '.join(SUPPORTED_IMAGE_FORMATS)}"
+        return False, f"Unsupported: {ext}. Supported: {', '.join(_SUPPORTED_IMAGE_DISPLAY)}"
+    try:                            st = os.stat(path)
+    except FileNotFoundError:       return False, f"File not found: {path}"
+    except OSError as e:            return False, f"Cannot read size: {e}"
+    if not stat.S_ISREG(st.st_mode): return False, f"Not a file: {path}"
+    mb = st.st_size / (1024 * 1024)
+    if mb > MAX_FILE_SIZE_MB:       return False, f"Too large ({mb:.1f} MB). Max: {MAX_FILE_SIZE_MB} MB"
+    if not st.st_size:              return False, "Empty file"
+    if not strict:                  return True, "OK"
+    try:
+        with open(path, "rb") as f: head = f.read(12)
+    except OSError as e:            return False, f"Cannot read file: {e}"
+    if not _looks_like_image(head): return False, "Not a recognised image (file header doesn't match)"
     return True, "OK"
 
 
+# Characters stripped from deck names — deleted in one str.translate pass
+_DECK_NAME_DELETE = str.maketrans("", "", '\\/*?"<>|')
+
+
+def _natural_sort_key(path: str) -> List:
+    """"page10.png" after "page9.png": digit runs compare as numbers."""
+    # split() with a capture group puts the digit runs at the odd indices, so
+    # convert those directly instead of testing every chunk with isdigit()
+    parts = _DIGIT_RUN_RE.split(os.path.basename(path).lower())
+    parts[1::2] = map(int, parts[1::2])
+    return parts
+
+
 def sanitize_deck_name(name: str) -> str:
     parts = name.split("::")
-    clean = [re.sub(r'[\\/*?"<>|]', "", p).strip() for p in parts]
+    clean = [p.translate(_DECK_NAME_DELETE).strip() for p in parts]
     return "::".join(p for p in clean if p) or "Imported"
 
 
+_config_write_lock = threading.Lock()
+_config_write_gen = [0]  # bumped per queued write; stale writes are skipped
+
+
+def write_config_in_background():
+    """
+    Persist CONFIG without blocking the UI on JSON encoding and disk I/O.
+
+    Takes a shallow snapshot now (settings edits replace values rather than
+    mutating them in place), and skips the write if a newer one was queued
+    meanwhile so an older snapshot can never land last.
+    """
+    payload = dict(CONFIG)
+    _config_write_gen[0] += 1
+    gen = _config_write_gen[0]
+
+    def write():
+        with _config_write_lock:
+            if gen == _config_write_gen[0]:
+                mw.addonManager.writeConfig(__name__, payload)
+
+    def done(fut):
+        try:
+            fut.result()
+        except Exception as e:
+            log_error("write_config", e)
+            showWarning(f"Could not save settings:\n\n{e}")
+
+    mw.taskman.run_in_background(write, done)
+
+
+_active_profile_cache: list = [None, None]  # [active_key, profile]
+
+
+def _invalidate_active_profile_cache():
+    """Call after anything replaces CONFIG["profiles"] or changes the active key."""
+    _active_profile_cache[0] = _active_profile_cache[1] = None
+
+
 def get_active_profile() -> Dict:
     key = CONFIG.get("active_profile", "MCQ")
+    if _active_profile_cache[0] == key and _active_profile_cache[1] is not None:
+        return _active_profile_cache[1]
     profiles = CONFIG.get("profiles", {})
-    return profiles.get(key) or next(iter(profiles.values()), {})
+    profile = profiles.get(key) or next(iter(profiles.values()), {})
+    _active_profile_cache[0], _active_profile_cache[1] = key, profile
+    return profile
 
 
 # ============================================================================
 # GEMINI API
 # ============================================================================
 
-def encode_image_base64(path: str) -> Optional[str]:
-    try:
+# Large images are encoded in chunks so the raw file is never held in full next
+# to its base64 copy. The chunk size is a multiple of 3, so no '=' padding
+# appears mid-stream and the concatenated chunks equal a one-shot encode.
+_B64_CHUNK_SIZE = 57 * 1024
+_B64_ONESHOT_MAX = 1024 * 1024
+_READ_BUFFER_SIZE = 1024 * 1024  # chunk reads are served from this, ~1 read syscall per MB
+
+# Request body fragments. Base64 never needs JSON escaping, so image data is
+# spliced into the body as bytes instead of round-tripping through json.dumps.
+_BODY_HEAD = b'{"contents":[{"parts":['
+_BODY_TAIL = b']}]}'
+_INLINE_JPEG_HEAD = b'{"inline_data":{"mime_type":"image/jpeg","data":"'
+_INLINE_TAIL = b'"}}'
+
+
+def _downscaled_jpeg(path: str, max_edge: int, quality: int, file_size: int = 0) -> Optional[bytes]:
+    """
+    JPEG bytes of the image shrunk to fit within max_edge × max_edge, or None
+    when the original should be sent: it already fits and is small, or Qt
+    can't decode it. Files over REENCODE_MIN_BYTES that fit (PNG screenshots,
+    BMPs) are still re-encoded, and kept only if the JPEG is smaller.
+
+    Uses QImage, which is safe off the GUI thread; Pillow isn't available in Anki.
+    """
+    heavy = file_size > REENCODE_MIN_BYTES
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    size = reader.size()  # header only — no decode for small images that already fit
+    if not heavy and size.isValid() and max(size.width(), size.height()) <= max_edge:
+        return None
+    img = reader.read()
+    if img.isNull():
+        return None
+    scaled = max(img.width(), img.height()) > max_edge
+    if scaled:
+        img = img.scaled(max_edge, max_edge, Qt.AspectRatioMode.KeepAspectRatio,
+                         Qt.TransformationMode.SmoothTransformation)
+    elif not heavy:
+        return None
+    if img.hasAlphaChannel():
+        # JPEG has no alpha: flatten onto white so dark text on transparency stays legible
+        flat = QImage(img.size(), QImage.Format.Format_RGB32)
+        flat.fill(Qt.GlobalColor.white)
+        painter = QPainter(flat)
+        painter.drawImage(0, 0, img)
+        painter.end()
+        img = flat
+    buf = QBuffer()
+    buf.open(QIODevice.OpenModeFlag.WriteOnly)
+    if not img.save(buf, "JPEG", quality):
+        return None
+    jpeg = bytes(buf.data())
+    return jpeg if scaled or len(jpeg) < file_size else None
+
+
+@functools.lru_cache(maxsize=4)
+def _encode_image_cached(path: str, mtime_ns: int, size: int,
+                         max_edge: int, quality: int) -> bytes:
+    # mtime/size are part of the key so an edited file is re-encoded.
+    # Raises on failure, so errors are never cached.
+    if max_edge > 0:
+        jpeg = _downscaled_jpeg(path, max_edge, quality, size)
+        if jpeg is not None:
+            return base64.b64encode(jpeg)
+    if size <= _B64_ONESHOT_MAX:
         with open(path, "rb") as f:
-            return base64.b64encode(f.read()).decode("utf-8")
+            return base64.b64encode(f.read())
+    buf = bytearray()
+    with open(path, "rb", buffering=_READ_BUFFER_SIZE) as f:
+        while chunk := f.read(_B64_CHUNK_SIZE):
+            buf += base64.b64encode(chunk)
+    return bytes(buf)
+
+
+def encode_image_base64(path: str, max_edge: int = 0,
+                        quality: int = JPEG_UPLOAD_QUALITY) -> Optional[bytes]:
+    """
+    ASCII base64 of the image at path (downscaled first if max_edge is set).
+
+    Results are memoized: during an import each page is also the next
+    page's context image, so it would otherwise be encoded twice.
+    """
+    try:
+        st = os.stat(path)
+        return _encode_image_cached(path, st.st_mtime_ns, st.st_size, max_edge, quality)
     except Exception as e:
-        log_error(f"encode_image: {path}", e)
+        log_error(f"encode_image: {path}", e, with_traceback=False)
         return None
 
 
+def _pause(seconds: float, cancel: Optional[threading.Event] = None) -> bool:
+    """Sleep for seconds, waking early if cancel is set. Returns True when cancelled."""
+    if cancel is None:
+        time.sleep(seconds)
+        return False
+    return cancel.wait(seconds)
+
+
+class RateLimiter:
+    """
+    Spaces calls at least 60/rpm seconds apart across all threads.
+
+    Each caller reserves the next free slot under the lock and sleeps outside
+    it, so concurrent workers queue up in order without holding the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._used_until = 0.0  # end of the interval of the last slot actually used
+
+    def acquire(self, rpm: float, cancel: Optional[threading.Event] = None) -> bool:
+        """Wait for the next slot. Returns True if cancel was set while waiting."""
+        if rpm <= 0:
+            return bool(cancel and cancel.is_set())
+        interval = 60.0 / rpm
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + interval
+        cancelled = _pause(slot - now, cancel) if slot > now else bool(cancel and cancel.is_set())
+        with self._lock:
+            if cancelled:
+                # Give the slot back if nobody has queued behind it; reset() clears the rest
+                if self._next_slot == slot + interval:
+                    self._next_slot = slot
+            else:
+                self._used_until = max(self._used_until, slot + interval)
+        return cancelled
+
+    def reset(self):
+        """Drop reservations left by cancelled waiters, keeping the spacing after the last real call."""
+        with self._lock:
+            self._next_slot = min(self._next_slot, max(self._used_until, time.monotonic()))
+
+
+_GEMINI_LIMITER = RateLimiter()
+
+
+def _lookup_rpm(limits, model: str) -> float:
+    if not isinstance(limits, dict):
+        return float(limits or 0)
+    for family, rpm in limits.items():
+        if family != "default" and family in model:
+            return float(rpm or 0)
+    return float(limits.get("default", 0) or 0)
+
+
+def requests_per_minute(model: str) -> float:
+    limits = CONFIG.get("requests_per_minute", DEFAULT_REQUESTS_PER_MINUTE)
+    try:
+        return _lookup_rpm(limits, model)
+    except (TypeError, ValueError) as e:
+        # A hand-edited non-numeric value shouldn't abort the import
+        log_error(f"requests_per_minute: invalid value {limits!r}, using defaults", e, with_traceback=False)
+        return _lookup_rpm(DEFAULT_REQUESTS_PER_MINUTE, model)
+
+
+def _retry_delay(retry_after: Optional[str], body: str, attempt: int) -> float:
+    """Seconds to wait before retrying a transient error.
+
+    Prefers the server's hint — a Retry-After header, or the RetryInfo
+    "retryDelay" Gemini puts in 429 bodies — over plain exponential backoff.
+    """
+    hint = retry_after
+    if not hint:
+        m = _RETRY_DELAY_RE.search(body)
+        hint = m.group(1) if m else None
+    jitter = random.uniform(0, RETRY_JITTER)
+    try:
+        if hint:
+            return min(float(hint), RETRY_MAX_DELAY) + jitter
+    except ValueError:
+        pass  # HTTP-date form of Retry-After; fall back to backoff
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt) + jitter
+
+
+def _build_request_body(parts: list) -> bytes:
+    """
+    generateContent JSON body from parts: str items become text parts, bytes
+    items (base64 JPEG) become inline_data parts. Image data is copied once,
+    by the final join.
+    """
+    pieces = [_BODY_HEAD]
+    for i, part in enumerate(parts):
+        if i:
+            pieces.append(b",")
+        if isinstance(part, bytes):
+            pieces += (_INLINE_JPEG_HEAD, part, _INLINE_TAIL)
+        else:
+            pieces.append(_json_dumps({"text": part}))
+    pieces.append(_BODY_TAIL)
+    return b"".join(pieces)
+
+
 def get_gemini_response(api_key: str, model: str, current_path: str,
                         prev_path: Optional[str] = None,
-                        prompt: Optional[str] = None) -> Tuple[bool, str]:
+                        prompt: Optional[str] = None,
+                        cancel: Optional[threading.Event] = None) -> Tuple[bool, str]:
+    # cancel is checked after every wait (rate-limit slot, retry backoff), so a
+    # cancelled import never sends a request that was still queued or backing off
     url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}"
     if prompt is None:
         prompt = get_active_profile().get("prompt", _SEED_MCQ_PROMPT)
 
-    cur_b64 = encode_image_base64(current_path)
+    max_edge = CONFIG.get("image_max_edge", DEFAULT_IMAGE_MAX_EDGE)
+    cur_b64 = encode_image_base64(current_path, max_edge)
     if not cur_b64:
         return False, f"Failed to encode image: {current_path}"
 
-    parts: List[Dict] = [{"text": prompt}]
+    parts: list = [prompt]
     if prev_path:
-        pb64 = encode_image_base64(prev_path)
+        pb64 = encode_image_base64(prev_path, max_edge)
         if pb64:
-            parts += [{"text": "--- CONTEXT ONLY (Previous Page) ---"},
-                      {"inline_data": {"mime_type": "image/jpeg", "data": pb64}}]
-    parts += [{"text": "--- TARGET IMAGE (Generate Cards) ---"},
-              {"inline_data": {"mime_type": "image/jpeg", "data": cur_b64}}]
-
-    data = json.dumps({"contents": [{"parts": parts}]}).encode()
-    try:
-        req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
-        with urllib.request.urlopen(req, timeout=120) as r:
-            result = json.loads(r.read().decode())
-        if not result.get("candidates"):
-            return False, "No response candidates from API"
-        candidate = result["candidates"][0]
-        if candidate.get("finishReason") == "SAFETY":
-            return False, "Content filtered by safety settings"
-        text = candidate.get("content", {}).get("parts", [{}])[0].get("text", "")
-        return (True, text) if text else (False, "Empty response from API")
-    except urllib.error.HTTPError as e:
-        rb = e.read().decode("utf-8", errors="ignore")
-        msgs = {400: f"Bad request (400): {rb}", 403: "API key invalid or unauthorized (403)",
-                429: "Rate limit exceeded (429). Wait and retry.", 500: "Gemini server error (500). Retry."}
-        return False, msgs.get(e.code, f"HTTP Error {e.code}: {rb}")
-    except urllib.error.URLError as e:
-        return False, f"Network error: {e}"
-    except Exception as e:
-        log_error("get_gemini_response", e)
-        return False, str(e)
+            parts += ["--- CONTEXT ONLY (Previous Page) ---", pb64]
+    parts += ["--- TARGET IMAGE (Generate Cards) ---", cur_b64]
+
+    data = _build_request_body(parts)
+    rpm = requests_per_minute(model)
+    for attempt in range(GEMINI_MAX_ATTEMPTS):
+        if _GEMINI_LIMITER.acquire(rpm, cancel):
+            return False, "Cancelled"
+        try:
+            result = _json_loads(_http_request(url, data, timeout=120))
+            if not result.get("candidates"):
+                return False, "No response candidates from API"
+            candidate = result["candidates"][0]
+            if candidate.get("finishReason") == "SAFETY":
+                return False, "Content filtered by safety settings"
+            text = candidate.get("content", {}).get("parts", [{}])[0].get("text", "")
+            return (True, text) if text else (False, "Empty response from API")
+        except urllib.error.HTTPError as e:
+            rb = e.read().decode("utf-8", errors="ignore")
+            if e.code in _RETRYABLE_HTTP_CODES and attempt + 1 < GEMINI_MAX_ATTEMPTS:
+                if _pause(_retry_delay(e.headers.get("Retry-After"), rb, attempt), cancel):
+                    return False, "Cancelled"
+                continue
+            msgs = {400: f"Bad request (400): {rb}", 401: "API key invalid or unauthorized (401)",
+                    403: "API key invalid or unauthorized (403)",
+                    429: "Rate limit exceeded (429). Wait and retry.", 500: "Gemini server error (500). Retry."}
+            return False, msgs.get(e.code, f"HTTP Error {e.code}: {rb}")
+        except urllib.error.URLError as e:
+            # Timeouts and dropped connections are usually transient too
+            if attempt + 1 < GEMINI_MAX_ATTEMPTS:
+                if _pause(_retry_delay(None, "", attempt), cancel):
+                    return False, "Cancelled"
+                continue
+            return False, f"Network error: {e}"
+        except Exception as e:
+            log_error("get_gemini_response", e)
+            return False, str(e)
+    return False, "Gemini request failed"
 
 
 # ============================================================================
 # CARD PARSERS
 # ============================================================================
 
-def _split_pipe(line: str, minimum: int) -> Optional[List[str]]:
-    parts = line.split("|")
-    return [p.strip() for p in parts] if len(parts) >= minimum else None
+def _iter_records(text: str, maxsplit: int):
+    """
+    Yield (line_no, columns) for every pipe-delimited line of a response,
+    skipping blanks and # comments. Columns are stripped; maxsplit caps the
+    split at the columns the caller actually uses. Records end at "\n" only:
+    splitlines() would also break on \u2028, \x85 etc. inside a field.
+    """
+    for i, raw in enumerate(text.strip().split("\n"), 1):
+        line = raw.strip()
+        if not line or line[0] == "#" or "|" not in line:
+            continue
+        yield i, [c.strip() for c in line.split("|", maxsplit)]
+
+
+def _warn_skip(fmt: str, i: int, why: str):
+    print(f"{fmt} parser warning: line {i} {why}, skipping")
 
 
 def parse_mcq_response(text: str) -> List[Dict]:
+    # MCQ is the default and by far the most common format, so it unrolls
+    # _iter_records with fixed-arity str.partition calls: no per-line list or
+    # generator frame, and only the five used columns are ever sliced out.
     cards = []
     for i, raw in enumerate(text.strip().split("\n"), 1):
         line = raw.strip()
-        if not line or line.startswith("#") or "|" not in line:
+        if not line or line[0] == "#":
             continue
-        p = _split_pipe(line, 5)
-        if not p:
-            print(f"MCQ parser warning: line {i} has <5 parts, skipping"); continue
-        if not p[1] or not p[2]:
+        sub, sep, rest = line.partition("|")
+        if not sep:
+            continue
+        q, _, rest = rest.partition("|")
+        choices, _, rest = rest.partition("|")
+        answer, sep, rest = rest.partition("|")
+        if not sep:
+            _warn_skip("MCQ", i, "has <5 parts"); continue
+        q, choices = q.strip(), choices.strip()
+        if not q or not choices:
             continue
-        cards.append({"subtopic": p[0], SLOT_QUESTION: p[1],
-                       SLOT_CHOICES: p[2], SLOT_ANSWER: p[3], SLOT_EXTRA: p[4]})
+        cards.append({"subtopic": sub.strip(), SLOT_QUESTION: q, SLOT_CHOICES: choices,
+                      SLOT_ANSWER: answer.strip(), SLOT_EXTRA: rest.partition("|")[0].strip()})
     return cards
 
 
 def parse_cloze_response(text: str) -> List[Dict]:
     cards = []
-    for i, raw in enumerate(text.strip().split("\n"), 1):
-        line = raw.strip()
-        if not line or line.startswith("#") or "|" not in line:
-            continue
-        p = _split_pipe(line, 2)
-        if not p:
-            print(f"Cloze parser warning: line {i} has <2 parts, skipping"); continue
-        body = p[1] if len(p) > 1 else ""
-        if not body or "{{c" not in body:
-            print(f"Cloze parser warning: line {i} missing cloze syntax, skipping"); continue
-        cards.append({"subtopic": p[0], SLOT_TEXT: body, SLOT_EXTRA: p[2] if len(p) > 2 else ""})
+    for i, p in _iter_records(text, 3):
+        if "{{c" not in p[1]:
+            _warn_skip("Cloze", i, "missing cloze syntax"); continue
+        cards.append({"subtopic": p[0], SLOT_TEXT: p[1], SLOT_EXTRA: p[2] if len(p) > 2 else ""})
     return cards
 
 
 def parse_basic_response(text: str) -> List[Dict]:
     cards = []
-    for i, raw in enumerate(text.strip().split("\n"), 1):
-        line = raw.strip()
-        if not line or line.startswith("#") or "|" not in line:
-            continue
-        p = _split_pipe(line, 3)
-        if not p:
-            print(f"Basic parser warning: line {i} has <3 parts, skipping"); continue
+    for i, p in _iter_records(text, 4):
+        if len(p) < 3:
+            _warn_skip("Basic", i, "has <3 parts"); continue
         if not p[1] or not p[2]:
             continue
-        cards.append({"subtopic": p[0], SLOT_QUESTION: p[1],
-                       SLOT_ANSWER: p[2], SLOT_EXTRA: p[3] if len(p) > 3 else ""})
+        cards.append({"subtopic": p[0], SLOT_QUESTION: p[1], SLOT_ANSWER: p[2],
+                      SLOT_EXTRA: p[3] if len(p) > 3 else ""})
     return cards
 
 
+_PARSERS = {"mcq": parse_mcq_response, "cloze": parse_cloze_response,
+            "basic": parse_basic_response}
+
+
 def parse_response(text: str, fmt: str) -> List[Dict]:
-    return {"mcq": parse_mcq_response, "cloze": parse_cloze_response,
-            "basic": parse_basic_response}.get(fmt, parse_mcq_response)(text)
+    return _PARSERS.get(fmt, parse_mcq_response)(text)
+
+
+# ============================================================================
+# UI HELPERS
+# ============================================================================
+
+@functools.lru_cache(maxsize=None)
+def _mono_font() -> QFont:
+    # Font matching happens on construction; built once, on first use (a QApplication must exist)
+    return QFont("Courier New", 9)
+
+
+def _rich_label(html: str, wrap: bool = False) -> QLabel:
+    # Explicit RichText skips QLabel's per-label "is this HTML?" sniffing
+    lbl = QLabel()
+    lbl.setTextFormat(Qt.TextFormat.RichText)
+    lbl.setWordWrap(wrap)
+    lbl.setText(html)
+    return lbl
+
+
+def _fill_combo(combo: QComboBox, items: List[Tuple[str, object]]):
+    """Replace combo's entries with (label, data) pairs via one prebuilt model — a single reset, not N inserts."""
+    model = QStandardItemModel(len(items), 1, combo)  # parented: setModel deletes the old one
+    for row, (label, data) in enumerate(items):
+        item = QStandardItem(label)
+        item.setData(data, Qt.ItemDataRole.UserRole)  # what currentData()/findData() read
+        model.setItem(row, 0, item)
+    combo.setModel(model)
+
+
+def _hline() -> QFrame:
+    # A sunken frame line, instead of a QLabel rendering an <hr> document
+    line = QFrame()
+    line.setFrameShape(QFrame.Shape.HLine)
+    line.setFrameShadow(QFrame.Shadow.Sunken)
+    return line
 
 
 # ============================================================================
@@ -671,7 +1194,9 @@ class NewProfileDialog(QDialog):
         form = QFormLayout()
         self.name_edit = QLineEdit()
         self.name_edit.setPlaceholderText("e.g. Low-Yield MCQ, Vocabulary, Step 1 Cloze…")
-        self.name_edit.textChanged.connect(self._validate)
+        # Qt checks "has a non-space character"; the slot only mirrors the result
+        self.name_edit.setValidator(QRegularExpressionValidator(QRegularExpression(r"\s*\S.*"), self.name_edit))
+        self.name_edit.textChanged.connect(lambda: self.ok_btn.setEnabled(self.name_edit.hasAcceptableInput()))
         form.addRow("<b>Profile Name:</b>", self.name_edit)
 
         self.fmt_combo = QComboBox()
@@ -688,9 +1213,6 @@ class NewProfileDialog(QDialog):
         self.ok_btn.setEnabled(False)
         layout.addWidget(btns)
 
-    def _validate(self):
-        self.ok_btn.setEnabled(bool(self.name_edit.text().strip()))
-
     def values(self) -> Tuple[str, str]:
         return self.name_edit.text().strip(), self.fmt_combo.currentData()
 
@@ -704,6 +1226,7 @@ class WelcomeWizard(QDialog):
         super().__init__(parent)
         self.setWindowTitle(f"Welcome to {ADDON_NAME}!")
         self.setMinimumWidth(600)
+        self._mcq_model = None  # cached MCQ note type lookup: None = not scanned, False = none found
         layout = QVBoxLayout(self)
 
         layout.addWidget(QLabel(f"""
@@ -714,7 +1237,7 @@ class WelcomeWizard(QDialog):
           <li><b>Download and install the Note Type</b> (MCQ cards only)</li>
         </ol>"""))
 
-        layout.addWidget(QLabel("<hr>"))
+        layout.addWidget(_hline())
         layout.addWidget(QLabel("<h3>Step 1: Gemini API Key</h3>"))
         help_lbl = QLabel(
             '<p>1. Visit <a href="https://aistudio.google.com/app/apikey">Google AI Studio</a><br>'
@@ -735,11 +1258,11 @@ class WelcomeWizard(QDialog):
         self.api_status.setWordWrap(True)
         layout.addWidget(self.api_status)
 
-        test_btn = QPushButton("Test API Connection")
-        test_btn.clicked.connect(self._test_api)
-        layout.addWidget(test_btn)
+        self.test_btn = QPushButton("Test API Connection")
+        self.test_btn.clicked.connect(self._test_api)
+        layout.addWidget(self.test_btn)
 
-        layout.addWidget(QLabel("<hr>"))
+        layout.addWidget(_hline())
         layout.addWidget(QLabel("<h3>Step 2: Note Type (MCQ only)</h3>"))
         nt_lbl = QLabel(
             "<p><b>Only needed for MCQ cards.</b> Basic and Cloze use Anki's built-in types.</p>"
@@ -762,7 +1285,7 @@ class WelcomeWizard(QDialog):
         self.nt_status.setWordWrap(True)
         layout.addWidget(self.nt_status)
 
-        layout.addWidget(QLabel("<hr>"))
+        layout.addWidget(_hline())
         row = QHBoxLayout()
         self.finish_btn = QPushButton("✓ Finish Setup")
         self.finish_btn.clicked.connect(self._finish)
@@ -779,34 +1302,52 @@ class WelcomeWizard(QDialog):
         if not v:
             self.api_status.setText(f"<span style='color:red'>❌ {msg}</span>"); return
         self.api_status.setText("Testing…")
-        QApplication.processEvents()
-        ok, model, msg, _ = choose_model_from_list(key)
-        if not ok or not model:
-            self.api_status.setText(f"<span style='color:red'>❌ {msg}</span>"); return
-        ok, msg = test_api_connection(key, model)
+        self.test_btn.setEnabled(False)
+
+        def probe() -> Tuple[bool, str]:
+            ok, model, msg, _ = choose_model_from_list(key)
+            if not ok or not model:
+                return False, msg
+            return test_api_connection(key, model)
+
+        # Both round trips run on Anki's worker pool; the wizard stays responsive
+        mw.taskman.run_in_background(probe, self._on_api_tested)
+
+    def _on_api_tested(self, fut):
+        self.test_btn.setEnabled(True)
+        ok, msg = fut.result()
         color, icon = ("green", "✓") if ok else ("red", "❌")
         self.api_status.setText(f"<span style='color:{color}'>{icon} {msg}</span>")
 
+    def _find_mcq_note_type(self):
+        # Names and ids only — no need to load every full note type dict.
+        # Cached so _finish doesn't rescan after _confirm_nt already did.
+        if self._mcq_model is None:
+            self._mcq_model = next((m for m in mw.col.models.all_names_and_ids()
+                                    if "Multiple Choice" in m.name or "MCQ" in m.name), False)
+        return self._mcq_model
+
     def _confirm_nt(self):
-        mcq = [m for m in mw.col.models.all() if "Multiple Choice" in m["name"] or "MCQ" in m["name"]]
+        self._mcq_model = None  # user may have just imported it — rescan
+        mcq = self._find_mcq_note_type()
         if mcq:
-            self.nt_status.setText(f"<span style='color:green'>✓ Found: {mcq[0]['name']}</span>")
+            self.nt_status.setText(f"<span style='color:green'>✓ Found: {mcq.name}</span>")
         elif askUser("No MCQ note type detected. Mark as installed anyway?"):
             self.nt_status.setText("<span style='color:orange'>⚠ Marked installed (none detected)</span>")
 
     def _finish(self):
         CONFIG["api_key"] = self.api_input.text().strip()
         CONFIG["show_welcome"] = False
-        for m in mw.col.models.all():
-            if "Multiple Choice" in m["name"] or "MCQ" in m["name"]:
-                CONFIG["note_type_id"] = m["id"]; break
-        mw.addonManager.writeConfig(__name__, CONFIG)
+        mcq = self._find_mcq_note_type()
+        if mcq:
+            CONFIG["note_type_id"] = mcq.id
+        write_config_in_background()  # queued behind (and never overwritten by) earlier writes
         self.accept()
         showInfo(f"Setup complete!\n\nUse ⚡ MCQ Importer → Import Images… to get started.")
 
     def _skip(self):
         CONFIG["show_welcome"] = False
-        mw.addonManager.writeConfig(__name__, CONFIG)
+        write_config_in_background()
         self.reject()
 
 
@@ -818,49 +1359,68 @@ class FieldMappingWidget(QGroupBox):
     def __init__(self, fmt: str, field_map: Dict[str, str], anki_fields: List[str], parent=None):
         super().__init__("Field Mapping", parent)
         self.combos: Dict[str, QComboBox] = {}
-        layout = QFormLayout(self)
+        self._layout = QFormLayout(self)
+        self._fmt: Optional[str] = None
+        self._fields: List[str] = []
+        self.reconfigure(fmt, field_map, anki_fields)
+
+    def reconfigure(self, fmt: str, field_map: Dict[str, str], anki_fields: List[str]):
+        """Show fmt's slots mapped per field_map. Rows are only rebuilt when the format changes."""
+        if fmt != self._fmt:
+            self._build_rows(fmt)
+        if anki_fields != self._fields:
+            for combo in self.combos.values():
+                combo.clear(); combo.addItems(anki_fields)
+            self._fields = list(anki_fields)
+        self._apply_mapping(field_map, anki_fields)
+
+    def _build_rows(self, fmt: str):
+        while self._layout.rowCount():
+            self._layout.removeRow(0)  # deletes the row's widgets
+        self.combos = {}
+        self._fmt, self._fields = fmt, []
         slots = SLOT_META.get(fmt, [])
         if not slots:
-            layout.addRow(QLabel("No field mapping needed for this format.")); return
+            self._layout.addRow(QLabel("No field mapping needed for this format.")); return
+        for slot_key, slot_label, slot_desc in slots:
+            combo = QComboBox()
+            lbl = QLabel(f"<b>{slot_label}</b><br><small>{slot_desc}</small>")
+            lbl.setWordWrap(True)
+            self._layout.addRow(lbl, combo)
+            self.combos[slot_key] = combo
 
+    def _apply_mapping(self, field_map: Dict[str, str], anki_fields: List[str]):
         # Track claimed indices so fuzzy fallback avoids already-mapped fields
         claimed: set = set()
+        lower_fields = [f.lower() for f in anki_fields]
 
-        for slot_key, slot_label, slot_desc in slots:
-            combo = QComboBox()
-            combo.addItems(anki_fields)
+        for slot_key, slot_label, _desc in SLOT_META.get(self._fmt, []):
+            combo = self.combos[slot_key]
             current = field_map.get(slot_key, "")
             idx = combo.findText(current)
             if idx >= 0:
                 # Exact match from saved config — always trust it
                 combo.setCurrentIndex(idx)
                 claimed.add(idx)
-            elif anki_fields:
+                continue
+            # Reused combos keep the last profile's pick; start from the first field like a new one
+            combo.setCurrentIndex(0 if anki_fields else -1)
+            if anki_fields:
                 # Fuzzy: search all words in the label (skip tiny words)
-                kws = [w for w in re.split(r"[\s/()]+", slot_label.lower()) if len(w) > 2]
-                matched = -1
-                # Prefer unclaimed fields first
-                for i, f in enumerate(anki_fields):
-                    if i not in claimed and any(kw in f.lower() for kw in kws):
-                        matched = i; break
-                # Allow claimed fields if still nothing matched
-                if matched < 0:
-                    for i, f in enumerate(anki_fields):
-                        if any(kw in f.lower() for kw in kws):
-                            matched = i; break
+                kws = [w for w in _LABEL_WORD_SEP_RE.split(slot_label.lower()) if len(w) > 2]
+                hits = [i for i, lf in enumerate(lower_fields) if any(kw in lf for kw in kws)]
+                # Prefer unclaimed fields first, allow claimed ones if nothing else matched
+                matched = next((i for i in hits if i not in claimed), hits[0] if hits else -1)
                 # Only apply if a keyword actually matched — never silently pick index 0
                 if matched >= 0:
                     combo.setCurrentIndex(matched)
                     claimed.add(matched)
-            lbl = QLabel(f"<b>{slot_label}</b><br><small>{slot_desc}</small>")
-            lbl.setWordWrap(True)
-            layout.addRow(lbl, combo)
-            self.combos[slot_key] = combo
 
     def get_mapping(self) -> Dict[str, str]:
         return {s: c.currentText() for s, c in self.combos.items()}
 
     def update_anki_fields(self, anki_fields: List[str]):
+        self._fields = list(anki_fields)
         for slot, combo in self.combos.items():
             cur = combo.currentText()
             combo.clear(); combo.addItems(anki_fields)
@@ -872,24 +1432,90 @@ class FieldMappingWidget(QGroupBox):
 # SETTINGS DIALOG
 # ============================================================================
 
+# Static help text for the settings tabs
+_PROFILES_INTRO_HTML = (
+    "<p>Each profile has its own prompt sent to Gemini. "
+    "The <b>active profile</b> is used on every import run. "
+    "Prompts are saved in your Anki config file and <b>survive addon updates</b> — "
+    "your edits are never overwritten. "
+    "Use <b>↩ Reset</b> to restore a built-in default prompt.</p>"
+)
+_PROMPT_TEXT_HINT_HTML = (
+    "<b>Prompt Text</b> — edit freely. Sent directly to Gemini. "
+    "Stored in your config; <i>never</i> overwritten by addon updates."
+)
+_NT_INTRO_HTML = (
+    "<p>Select the Anki note type for the <b>active profile</b>, then map each logical slot "
+    "to the correct field in that note type. Handles any field naming convention.</p>"
+)
+_NT_DOWNLOAD_HTML = (
+    f'<p><b>Need the MCQ note type?</b> '
+    f'<a href="{NOTE_TYPE_DOWNLOAD_URL}">Download here</a></p>'
+)
+
+
 class GeminiSettings(QDialog):
+    _API_TAB, _PROFILES_TAB, _NT_TAB, _ADVANCED_TAB = range(4)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle(f"{ADDON_NAME} Settings")
         self.setMinimumWidth(760)
         self.setMinimumHeight(730)
 
-        self._profiles: Dict = copy.deepcopy(CONFIG.get("profiles", {}))
+        # Copy-on-write: profile dicts are shared with CONFIG until first edited
+        # (see _mut), so opening and cancelling the dialog copies nothing.
+        self._profiles: Dict = dict(CONFIG.get("profiles", {}))
+        self._owned: set = set()
         self._active_key: str = CONFIG.get("active_profile", "MCQ")
         self._fmap_widget: Optional[FieldMappingWidget] = None
+        self._fmap_key: Optional[str] = None  # profile the mapping widget is showing
+        # Field names per note type id, read once per _refresh_note_types
+        self._fields_cache: Dict[int, List[str]] = {}
+        self._fields_text_cache: Dict[int, str] = {}  # "View All Fields" listings, built on demand
 
         layout = QVBoxLayout(self)
-        tabs = QTabWidget()
-        layout.addWidget(tabs)
+        # Tab pages start empty and are filled the first time they're shown, so
+        # opening the dialog only pays for the visible tab (and the note type
+        # list is only read if the Note Type tab is opened).
+        self._tabs = QTabWidget()
+        layout.addWidget(self._tabs)
+        self._tab_builders = (self._build_api_tab, self._build_profiles_tab,
+                              self._build_nt_tab, self._build_advanced_tab)
+        self._built: set = set()
+        for title in ("API Settings", "Prompt Profiles", "Note Type & Fields", "Advanced"):
+            self._tabs.addTab(QWidget(), title)
+        self._tabs.currentChanged.connect(self._ensure_tab)
 
-        # ── Tab 1: API ────────────────────────────────────────────────────
-        api_tab = QWidget(); al = QVBoxLayout(api_tab)
-        tabs.addTab(api_tab, "API Settings")
+        # Bottom save/cancel
+        bot = QHBoxLayout()
+        save_btn = QPushButton("💾 Save Settings")
+        save_btn.setDefault(True)
+        save_btn.clicked.connect(self._save)
+        bot.addWidget(save_btn)
+        cancel_btn = QPushButton("Cancel")
+        cancel_btn.clicked.connect(self.reject)
+        bot.addWidget(cancel_btn)
+        layout.addLayout(bot)
+        self._shown = False
+
+    # ── lazy tabs ─────────────────────────────────────────────────────────
+
+    def showEvent(self, e):
+        super().showEvent(e)
+        if not self._shown:
+            # Paint the dialog frame first; the opening tab is filled on the next loop pass
+            self._shown = True
+            QTimer.singleShot(0, lambda: self._ensure_tab(self._tabs.currentIndex()))
+
+    def _ensure_tab(self, i: int):
+        if i in self._built or not 0 <= i < len(self._tab_builders):
+            return
+        self._built.add(i)
+        self._tab_builders[i](self._tabs.widget(i))
+
+    def _build_api_tab(self, page: QWidget):
+        al = QVBoxLayout(page)
 
         al.addWidget(QLabel("<h3>Gemini API Configuration</h3>"))
         lnk = QLabel('<p>Get your free key at <a href="https://aistudio.google.com/app/apikey">Google AI Studio</a>.</p>')
@@ -905,10 +1531,10 @@ class GeminiSettings(QDialog):
         al.addWidget(show_btn)
         self.api_status_lbl = QLabel(""); self.api_status_lbl.setWordWrap(True)
         al.addWidget(self.api_status_lbl)
-        test_btn = QPushButton("Test API Connection")
-        test_btn.clicked.connect(self._test_api)
-        al.addWidget(test_btn)
-        al.addWidget(QLabel("<hr>"))
+        self.test_btn = QPushButton("Test API Connection")
+        self.test_btn.clicked.connect(self._test_api)
+        al.addWidget(self.test_btn)
+        al.addWidget(_hline())
         al.addWidget(QLabel("<b>Gemini Model:</b>"))
         al.addWidget(QLabel("<i>Flash = faster/cheaper · Pro = more capable</i>"))
         self.model_combo = QComboBox()
@@ -916,23 +1542,16 @@ class GeminiSettings(QDialog):
         self.model_combo.setEditable(True)
         self.model_combo.setCurrentText(CONFIG.get("model", "gemini-2.5-flash-preview-05-20"))
         al.addWidget(self.model_combo)
-        ref_btn = QPushButton("🔄 Refresh Available Models")
-        ref_btn.clicked.connect(self._refresh_models)
-        al.addWidget(ref_btn)
+        self.ref_models_btn = QPushButton("🔄 Refresh Available Models")
+        self.ref_models_btn.clicked.connect(self._refresh_models)
+        al.addWidget(self.ref_models_btn)
         al.addStretch()
 
-        # ── Tab 2: Prompt Profiles ────────────────────────────────────────
-        pt = QWidget(); pl = QVBoxLayout(pt)
-        tabs.addTab(pt, "Prompt Profiles")
+    def _build_profiles_tab(self, page: QWidget):
+        pl = QVBoxLayout(page)
 
         pl.addWidget(QLabel("<h3>Prompt Profiles</h3>"))
-        pl.addWidget(QLabel(
-            "<p>Each profile has its own prompt sent to Gemini. "
-            "The <b>active profile</b> is used on every import run. "
-            "Prompts are saved in your Anki config file and <b>survive addon updates</b> — "
-            "your edits are never overwritten. "
-            "Use <b>↩ Reset</b> to restore a built-in default prompt.</p>"
-        ))
+        pl.addWidget(_rich_label(_PROFILES_INTRO_HTML))
 
         # Selector row
         sr = QHBoxLayout()
@@ -979,13 +1598,10 @@ class GeminiSettings(QDialog):
         fr.addWidget(self.fmt_lbl, 1)
         pl.addLayout(fr)
 
-        pl.addWidget(QLabel(
-            "<b>Prompt Text</b> — edit freely. Sent directly to Gemini. "
-            "Stored in your config; <i>never</i> overwritten by addon updates."
-        ))
+        pl.addWidget(_rich_label(_PROMPT_TEXT_HINT_HTML))
         self.prompt_edit = QPlainTextEdit()
         self.prompt_edit.setMinimumHeight(280)
-        self.prompt_edit.setFont(QFont("Courier New", 9))
+        self.prompt_edit.setFont(_mono_font())
         self.prompt_edit.textChanged.connect(self._on_prompt_changed)
         pl.addWidget(self.prompt_edit)
 
@@ -999,23 +1615,18 @@ class GeminiSettings(QDialog):
         br.addWidget(self.char_lbl)
         pl.addLayout(br)
 
-        # ── Tab 3: Note Type & Field Mapping ─────────────────────────────
-        nt = QWidget(); nl = QVBoxLayout(nt)
-        tabs.addTab(nt, "Note Type & Fields")
+        self._refresh_profile_combo()
+
+    def _build_nt_tab(self, page: QWidget):
+        nl = QVBoxLayout(page)
 
         nl.addWidget(QLabel("<h3>Note Type & Field Mapping</h3>"))
-        nl.addWidget(QLabel(
-            "<p>Select the Anki note type for the <b>active profile</b>, then map each logical slot "
-            "to the correct field in that note type. Handles any field naming convention.</p>"
-        ))
-        nl.addWidget(QLabel(
-            f'<p><b>Need the MCQ note type?</b> '
-            f'<a href="{NOTE_TYPE_DOWNLOAD_URL}">Download here</a></p>'
-        ))
+        nl.addWidget(_rich_label(_NT_INTRO_HTML))
+        nl.addWidget(_rich_label(_NT_DOWNLOAD_HTML))
         dl_btn = QPushButton("🌐 Open Note Type Download Page")
         dl_btn.clicked.connect(lambda: QDesktopServices.openUrl(QUrl(NOTE_TYPE_DOWNLOAD_URL)))
         nl.addWidget(dl_btn)
-        nl.addWidget(QLabel("<hr>"))
+        nl.addWidget(_hline())
 
         ntr = QHBoxLayout()
         ntr.addWidget(QLabel("<b>Note Type:</b>"))
@@ -1034,9 +1645,11 @@ class GeminiSettings(QDialog):
         nl.addLayout(self.fmap_container)
         nl.addStretch()
 
-        # ── Tab 4: Advanced ───────────────────────────────────────────────
-        av_tab = QWidget(); av = QVBoxLayout(av_tab)
-        tabs.addTab(av_tab, "Advanced")
+        self._refresh_note_types(silent=True)
+        self._rebuild_fmap(self._cur_key())
+
+    def _build_advanced_tab(self, page: QWidget):
+        av = QVBoxLayout(page)
 
         av.addWidget(QLabel("<h3>Advanced Options</h3>"))
         self.auto_open_cb = QCheckBox("Automatically open media folder after import")
@@ -1050,63 +1663,86 @@ class GeminiSettings(QDialog):
         self.batch_spin.setValue(CONFIG.get("batch_size", 10))
         batch_r.addWidget(self.batch_spin); batch_r.addStretch()
         av.addLayout(batch_r)
-        av.addWidget(QLabel("<hr>"))
+        edge_r = QHBoxLayout()
+        edge_r.addWidget(QLabel("Downscale images larger than:"))
+        self.max_edge_spin = QSpinBox()
+        self.max_edge_spin.setRange(0, 8192)
+        self.max_edge_spin.setSingleStep(128)
+        self.max_edge_spin.setSuffix(" px")
+        self.max_edge_spin.setSpecialValueText("Off (send originals)")
+        self.max_edge_spin.setToolTip("Longest edge sent to Gemini. Smaller uploads are faster and use fewer tokens; "
+                                      "raise it if small print in your images is being misread.")
+        self.max_edge_spin.setValue(CONFIG.get("image_max_edge", DEFAULT_IMAGE_MAX_EDGE))
+        edge_r.addWidget(self.max_edge_spin); edge_r.addStretch()
+        av.addLayout(edge_r)
+        conc_r = QHBoxLayout()
+        conc_r.addWidget(QLabel("Parallel Gemini requests:"))
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, 16)
+        self.concurrency_spin.setToolTip("Images sent to Gemini at the same time. Higher is faster on paid tiers; "
+                                         "requests are still paced by requests_per_minute.")
+        self.concurrency_spin.setValue(CONFIG.get("gemini_concurrency", GEMINI_MAX_IN_FLIGHT))
+        conc_r.addWidget(self.concurrency_spin); conc_r.addStretch()
+        av.addLayout(conc_r)
+        av.addWidget(_hline())
         self.startup_cb = QCheckBox("Validate API connection on Anki startup (slower startup)")
         self.startup_cb.setChecked(CONFIG.get("validate_api_on_startup", False))
         av.addWidget(self.startup_cb)
-        av.addWidget(QLabel("<hr>"))
+        av.addWidget(_hline())
         ra_btn = QPushButton("Reset ALL Built-in Profile Prompts to Factory Defaults")
         ra_btn.setToolTip("Only resets MCQ, Cloze, Basic prompts. Custom profiles untouched.")
         ra_btn.clicked.connect(self._reset_all_prompts)
         av.addWidget(ra_btn)
         av.addStretch()
 
-        # Bottom save/cancel
-        bot = QHBoxLayout()
-        save_btn = QPushButton("💾 Save Settings")
-        save_btn.setDefault(True)
-        save_btn.clicked.connect(self._save)
-        bot.addWidget(save_btn)
-        cancel_btn = QPushButton("Cancel")
-        cancel_btn.clicked.connect(self.reject)
-        bot.addWidget(cancel_btn)
-        layout.addLayout(bot)
-
-        self._refresh_note_types(silent=True)
-        self._refresh_profile_combo()
+    @contextmanager
+    def _silenced(self, *widgets):
+        """Batch programmatic edits: no change signals fire until the block exits."""
+        for w in widgets: w.blockSignals(True)
+        try:
+            yield
+        finally:
+            for w in widgets: w.blockSignals(False)
 
     # ── profile helpers ───────────────────────────────────────────────────
 
+    def _mut(self, key: str) -> Dict:
+        """Profile dict for key, privately copied on first write so CONFIG is untouched until save."""
+        if key not in self._owned:
+            self._profiles[key] = _copy_profile(self._profiles[key])
+            self._owned.add(key)
+        return self._profiles[key]
+
     def _refresh_profile_combo(self):
-        self.profile_combo.blockSignals(True)
-        self.profile_combo.clear()
-        for key, p in self._profiles.items():
-            label = p.get("display_name", key)
-            if key == self._active_key: label = f"⭐ {label}"
-            self.profile_combo.addItem(label, key)
-        idx = self.profile_combo.findData(self._active_key)
-        self.profile_combo.setCurrentIndex(max(idx, 0))
-        self.profile_combo.blockSignals(False)
+        keys = list(self._profiles)
+        labels = [p.get("display_name", k) for k, p in self._profiles.items()]
+        # Active profile is located once (no per-item branch or findData scan)
+        active = keys.index(self._active_key) if self._active_key in self._profiles else 0
+        if self._active_key in self._profiles:
+            labels[active] = f"⭐ {labels[active]}"
+        with self._silenced(self.profile_combo):
+            _fill_combo(self.profile_combo, list(zip(labels, keys)))
+            self.profile_combo.setCurrentIndex(active)
         self._on_profile_changed(self.profile_combo.currentIndex())
 
     def _cur_key(self) -> str:
+        if self._PROFILES_TAB not in self._built:
+            # The profile combo opens on the active profile
+            return self._active_key if self._active_key in self._profiles else next(iter(self._profiles))
         return self.profile_combo.currentData() or list(self._profiles.keys())[0]
 
     def _on_profile_changed(self, _i: int):
         key = self._cur_key()
         p   = self._profiles.get(key, {})
 
-        self.name_edit.blockSignals(True)
-        self.name_edit.setText(p.get("display_name", key))
-        self.name_edit.blockSignals(False)
+        with self._silenced(self.name_edit):
+            self.name_edit.setText(p.get("display_name", key))
 
         fmt = p.get("format", "mcq")
-        labels = {"mcq": "Multiple Choice (MCQ)", "cloze": "Cloze Deletion", "basic": "Basic (Front/Back)"}
-        self.fmt_lbl.setText(f"<i>{labels.get(fmt, fmt)}</i>")
+        self.fmt_lbl.setText(f"<i>{_FMT_LABELS.get(fmt, fmt)}</i>")
 
-        self.prompt_edit.blockSignals(True)
-        self.prompt_edit.setPlainText(p.get("prompt", ""))
-        self.prompt_edit.blockSignals(False)
+        with self._silenced(self.prompt_edit):
+            self.prompt_edit.setPlainText(p.get("prompt", ""))
         self._update_chars()
 
         if key == self._active_key:
@@ -1114,23 +1750,34 @@ class GeminiSettings(QDialog):
         else:
             self.active_ind.setText("<span style='color:gray'>Not active. Click ⭐ Set as Active to use on import.</span>")
 
-        self._rebuild_fmap(p)
+        if key != self._fmap_key:
+            # Same profile already shown (e.g. the Note Type tab was opened and edited
+            # before this one was built): keep its unsaved mapping edits
+            self._rebuild_fmap(key)
 
     def _on_name_changed(self, text: str):
         key = self._cur_key()
-        if key in self._profiles:
-            self._profiles[key]["display_name"] = text
+        p = self._profiles.get(key)
+        if p is not None and p.get("display_name") != text:
+            self._mut(key)["display_name"] = text
             label = text if key != self._active_key else f"⭐ {text}"
             self.profile_combo.setItemText(self.profile_combo.currentIndex(), label)
 
     def _on_prompt_changed(self):
+        text = self.prompt_edit.toPlainText()  # one copy per keystroke, shared with the counter
         key = self._cur_key()
-        if key in self._profiles:
-            self._profiles[key]["prompt"] = self.prompt_edit.toPlainText()
-        self._update_chars()
-
-    def _update_chars(self):
-        self.char_lbl.setText(f"<small>{len(self.prompt_edit.toPlainText()):,} chars</small>")
+        p = self._profiles.get(key)
+        # No-op edits (undo back to the saved text, re-pasting the same text) don't
+        # copy the profile; str != checks lengths first, so a real edit is cheap
+        if p is not None and p.get("prompt") != text:
+            self._mut(key)["prompt"] = text
+        self._update_chars(len(text))
+
+    def _update_chars(self, n: Optional[int] = None):
+        if n is None:
+            # Count from the document itself, without copying it out (minus the final block separator)
+            n = self.prompt_edit.document().characterCount() - 1
+        self.char_lbl.setText(f"<small>{n:,} chars</small>")
 
     def _set_active(self):
         key = self._cur_key()
@@ -1140,13 +1787,14 @@ class GeminiSettings(QDialog):
 
     def _duplicate(self):
         key = self._cur_key()
-        p   = copy.deepcopy(self._profiles[key])
+        p   = _copy_profile(self._profiles[key])
         base = p.get("display_name", key) + " (Copy)"
         new_key = base; n = 1
         while new_key in self._profiles:
             new_key = f"{base} {n}"; n += 1
         p["display_name"] = base
         self._profiles[new_key] = p
+        self._owned.add(new_key)
         self._refresh_profile_combo()
         idx = self.profile_combo.findData(new_key)
         if idx >= 0: self.profile_combo.setCurrentIndex(idx)
@@ -1168,8 +1816,9 @@ class GeminiSettings(QDialog):
             "display_name": display,
             "format":       fmt,
             "prompt":       _BLANK_PROMPT_SCAFFOLDS.get(fmt, ""),
-            "field_map":    copy.deepcopy(schema["field_map"]),
+            "field_map":    dict(schema["field_map"]),
         }
+        self._owned.add(new_key)
         self._refresh_profile_combo()
         idx = self.profile_combo.findData(new_key)
         if idx >= 0: self.profile_combo.setCurrentIndex(idx)
@@ -1185,6 +1834,7 @@ class GeminiSettings(QDialog):
         if not askUser(f"Delete profile '{name}'?\n\nThis cannot be undone."):
             return
         del self._profiles[key]
+        self._owned.discard(key)
         if self._active_key == key: self._active_key = "MCQ"
         self._refresh_profile_combo()
 
@@ -1197,25 +1847,24 @@ class GeminiSettings(QDialog):
             return
         if not askUser("Reset this prompt to the factory default?\n\nYour current edits will be lost."):
             return
-        self._profiles[key]["prompt"] = seed
-        self.prompt_edit.blockSignals(True)
-        self.prompt_edit.setPlainText(seed)
-        self.prompt_edit.blockSignals(False)
+        self._mut(key)["prompt"] = seed
+        with self._silenced(self.prompt_edit):
+            self.prompt_edit.setPlainText(seed)
         self._update_chars()
         tooltip("Prompt reset to factory default.", period=2000)
 
     # ── note type helpers ─────────────────────────────────────────────────
 
     def _refresh_note_types(self, silent: bool = False):
-        self.nt_combo.blockSignals(True)
-        self.nt_combo.clear()
-        for m in mw.col.models.all():
-            self.nt_combo.addItem(m["name"], m["id"])
-        saved = CONFIG.get("note_type_id")
-        if saved:
-            idx = self.nt_combo.findData(saved)
-            if idx >= 0: self.nt_combo.setCurrentIndex(idx)
-        self.nt_combo.blockSignals(False)
+        models = mw.col.models.all()
+        self._fields_cache = {m["id"]: [f["name"] for f in m["flds"]] for m in models}
+        self._fields_text_cache = {}
+        with self._silenced(self.nt_combo):
+            _fill_combo(self.nt_combo, [(m["name"], m["id"]) for m in models])
+            saved = CONFIG.get("note_type_id")
+            if saved:
+                idx = self.nt_combo.findData(saved)
+                if idx >= 0: self.nt_combo.setCurrentIndex(idx)
         if not silent: self._on_nt_changed(self.nt_combo.currentIndex())
 
     def _on_nt_changed(self, _i: int):
@@ -1223,29 +1872,30 @@ class GeminiSettings(QDialog):
             self._fmap_widget.update_anki_fields(self._anki_fields())
 
     def _anki_fields(self) -> List[str]:
-        nt_id = self.nt_combo.currentData()
-        if not nt_id: return []
-        m = mw.col.models.get(nt_id)
-        return [f["name"] for f in m["flds"]] if m else []
-
-    def _rebuild_fmap(self, profile: Dict):
+        return self._fields_cache.get(self.nt_combo.currentData(), [])
+
+    def _rebuild_fmap(self, key: str):
+        if self._NT_TAB not in self._built:
+            return  # built with the tab
+        profile = self._profiles.get(key, {})
+        fmt, fmap = profile.get("format", "mcq"), profile.get("field_map", {})
+        self._fmap_key = key
         if self._fmap_widget:
-            self.fmap_container.removeWidget(self._fmap_widget)
-            self._fmap_widget.deleteLater()
-            self._fmap_widget = None
-        w = FieldMappingWidget(profile.get("format", "mcq"),
-                               profile.get("field_map", {}),
-                               self._anki_fields())
-        self.fmap_container.addWidget(w)
-        self._fmap_widget = w
+            # One widget for the dialog's lifetime; rows are reused across profiles
+            self._fmap_widget.reconfigure(fmt, fmap, self._anki_fields())
+            return
+        self._fmap_widget = FieldMappingWidget(fmt, fmap, self._anki_fields())
+        self.fmap_container.addWidget(self._fmap_widget)
 
     def _show_fields(self):
         nt_id = self.nt_combo.currentData()
         if not nt_id: showWarning("Select a note type first."); return
-        m = mw.col.models.get(nt_id)
-        if not m: showWarning("Note type not found."); return
-        fields = "\n".join(f"{i+1}. {f['name']}" for i, f in enumerate(m["flds"]))
-        showInfo(f"Fields in '{m['name']}':\n\n{fields}")
+        if nt_id not in self._fields_cache: showWarning("Note type not found."); return
+        fields = self._fields_text_cache.get(nt_id)
+        if fields is None:
+            fields = self._fields_text_cache[nt_id] = "\n".join(
+                f"{i+1}. {name}" for i, name in enumerate(self._fields_cache[nt_id]))
+        showInfo(f"Fields in '{self.nt_combo.currentText()}':\n\n{fields}")
 
     # ── API helpers ───────────────────────────────────────────────────────
 
@@ -1263,12 +1913,23 @@ class GeminiSettings(QDialog):
         if not v:
             self.api_status_lbl.setText(f"<span style='color:red'>❌ {msg}</span>"); return
         self.api_status_lbl.setText("Testing…")
-        QApplication.processEvents()
-        ok, sel, lmsg, _ = choose_model_from_list(key, model)
-        if not ok or not sel:
-            self.api_status_lbl.setText(f"<span style='color:red'>❌ {lmsg}</span>"); return
-        if sel != model: self.model_combo.setCurrentText(sel)
-        ok, msg = test_api_connection(key, sel)
+        self.test_btn.setEnabled(False)
+
+        def probe() -> Tuple[bool, Optional[str], str, str]:
+            ok, sel, lmsg, _ = choose_model_from_list(key, model)
+            if not ok or not sel:
+                return False, None, lmsg, lmsg
+            ok, msg = test_api_connection(key, sel)
+            return ok, sel, msg, lmsg
+
+        # Both round trips run on Anki's worker pool; results land in one main-thread callback
+        mw.taskman.run_in_background(probe, self._on_api_tested)
+
+    def _on_api_tested(self, fut):
+        self.test_btn.setEnabled(True)
+        ok, sel, msg, lmsg = fut.result()
+        if sel and sel != self.model_combo.currentText().strip():
+            self.model_combo.setCurrentText(sel)
         c, i = ("green", "✓") if ok else ("red", "❌")
         self.api_status_lbl.setText(f"<span style='color:{c}'>{i} {msg}</span>")
         if ok: tooltip(f"Connection successful! {lmsg}", period=3000)
@@ -1278,8 +1939,13 @@ class GeminiSettings(QDialog):
         if not key:
             self.api_status_lbl.setText("<span style='color:red'>Enter API key first.</span>"); return
         self.api_status_lbl.setText("Refreshing…")
-        QApplication.processEvents()
-        ok, models, msg = list_generate_models(key)
+        self.ref_models_btn.setEnabled(False)
+        # Network round trip runs on Anki's worker pool; the dialog stays responsive
+        mw.taskman.run_in_background(lambda: list_generate_models(key), self._on_models_listed)
+
+    def _on_models_listed(self, fut):
+        self.ref_models_btn.setEnabled(True)
+        ok, models, msg = fut.result()
         if not ok:
             self.api_status_lbl.setText(f"<span style='color:red'>❌ {msg}</span>"); return
         cur = self.model_combo.currentText().strip()
@@ -1293,43 +1959,61 @@ class GeminiSettings(QDialog):
             return
         for key, seed in _SEED_PROMPTS.items():
             if key in self._profiles:
-                self._profiles[key]["prompt"] = seed
+                self._mut(key)["prompt"] = seed
         cur = self._cur_key()
-        if cur in BUILTIN_PROFILE_KEYS:
-            self.prompt_edit.blockSignals(True)
-            self.prompt_edit.setPlainText(self._profiles[cur]["prompt"])
-            self.prompt_edit.blockSignals(False)
+        if cur in BUILTIN_PROFILE_KEYS and self._PROFILES_TAB in self._built:
+            with self._silenced(self.prompt_edit):
+                self.prompt_edit.setPlainText(self._profiles[cur]["prompt"])
             self._update_chars()
         tooltip("Built-in prompts reset to factory defaults.", period=2000)
 
     # ── save ──────────────────────────────────────────────────────────────
 
     def _save(self):
-        key = self.api_input.text().strip()
-        if key:
-            v, msg = validate_api_key(key)
-            if not v: showWarning(f"Invalid API key:\n\n{msg}"); return
-
-        nt_id = self.nt_combo.currentData()
-        if not nt_id:
-            if not askUser("No note type selected. Continue anyway?"):
-                return
-
-        # Flush current field mapping into its profile
+        # Tabs that were never opened can't have been edited: keep their saved values
+        built = self._built
+        if self._API_TAB in built:
+            key = self.api_input.text().strip()
+            if key:
+                v, msg = validate_api_key(key)
+                if not v: showWarning(f"Invalid API key:\n\n{msg}"); return
+
+        if self._NT_TAB in built:
+            nt_id = self.nt_combo.currentData()
+            if not nt_id:
+                if not askUser("No note type selected. Continue anyway?"):
+                    return
+
+        # Flush current field mapping into its profile (copying it only if it changed)
         pk = self._cur_key()
         if self._fmap_widget and pk in self._profiles:
-            self._profiles[pk]["field_map"] = self._fmap_widget.get_mapping()
+            mapping = self._fmap_widget.get_mapping()
+            if mapping != self._profiles[pk].get("field_map"):
+                self._mut(pk)["field_map"] = mapping
+
+        updates = {"active_profile": self._active_key, "profiles": self._profiles}
+        if self._API_TAB in built:
+            updates["api_key"] = key
+            updates["model"]   = self.model_combo.currentText().strip()
+        if self._NT_TAB in built:
+            updates["note_type_id"] = nt_id
+        if self._ADVANCED_TAB in built:
+            updates["auto_open_media"]         = self.auto_open_cb.isChecked()
+            updates["batch_size"]              = self.batch_spin.value()
+            updates["image_max_edge"]          = self.max_edge_spin.value()
+            updates["gemini_concurrency"]      = self.concurrency_spin.value()
+            updates["validate_api_on_startup"] = self.startup_cb.isChecked()
+
+        # Untouched profiles are still the very dicts in CONFIG (copy-on-write), so
+        # this comparison is mostly identity checks
+        if all(CONFIG.get(k) == v for k, v in updates.items()):
+            self.accept()
+            return
 
-        CONFIG["api_key"]               = key
-        CONFIG["model"]                 = self.model_combo.currentText().strip()
-        CONFIG["note_type_id"]          = nt_id
-        CONFIG["active_profile"]        = self._active_key
-        CONFIG["profiles"]              = self._profiles
-        CONFIG["auto_open_media"]       = self.auto_open_cb.isChecked()
-        CONFIG["batch_size"]            = self.batch_spin.value()
-        CONFIG["validate_api_on_startup"] = self.startup_cb.isChecked()
+        CONFIG.update(updates)
+        _invalidate_active_profile_cache()
 
-        mw.addonManager.writeConfig(__name__, CONFIG)
+        write_config_in_background()
         self.accept()
         tooltip("Settings saved!", period=2000)
 
@@ -1348,39 +2032,62 @@ class ImportProgressDialog(QDialog):
         self.status_lbl = QLabel("Initializing…"); self.status_lbl.setWordWrap(True)
         layout.addWidget(self.status_lbl)
         self.progress_bar = QProgressBar(); layout.addWidget(self.progress_bar)
-        self.detail_box = QTextEdit(); self.detail_box.setReadOnly(True)
+        # Plain text (no rich-text layout per append), capped so long imports stay cheap
+        self.detail_box = QPlainTextEdit(); self.detail_box.setReadOnly(True)
+        self.detail_box.setMaximumBlockCount(PROGRESS_LOG_MAX_LINES)
         self.detail_box.setMaximumHeight(150); layout.addWidget(self.detail_box)
         self.cancel_btn = QPushButton("Cancel Import")
         self.cancel_btn.clicked.connect(self._cancel)
         layout.addWidget(self.cancel_btn)
         self.cancelled = False; self.complete = False
 
+        # Updates are only recorded here and painted at ~30 Hz by _flush_ui;
+        # the importer pumps the event loop while it waits on Gemini.
+        self._pending_progress: Optional[Tuple[int, int, str]] = None
+        self._pending_details: List[str] = []
+        self._flush_timer = QTimer(self)
+        self._flush_timer.timeout.connect(self._flush_ui)
+        self._flush_timer.start(33)
+
     def update_progress(self, cur: int, total: int, status: str):
-        self.progress_bar.setMaximum(total); self.progress_bar.setValue(cur)
-        self.status_lbl.setText(f"{status} ({cur}/{total})")
-        QApplication.processEvents()
+        self._pending_progress = (cur, total, status)
 
     def add_detail(self, msg: str):
-        self.detail_box.append(msg); QApplication.processEvents()
+        self._pending_details.append(msg)
+        if self.complete: self._flush_ui()  # flush timer is stopped once the import ends
+
+    def _flush_ui(self):
+        if self._pending_progress:
+            cur, total, status = self._pending_progress
+            self._pending_progress = None
+            self.progress_bar.setMaximum(total); self.progress_bar.setValue(cur)
+            self.status_lbl.setText(f"{status} ({cur}/{total})")
+        if self._pending_details:
+            self.detail_box.appendPlainText("\n".join(self._pending_details))
+            self._pending_details.clear()
 
     def is_cancelled(self): return self.cancelled
 
     def mark_complete(self):
+        self._flush_timer.stop(); self._flush_ui()
         self.complete = True; self.cancel_btn.setText("Close")
         self.status_lbl.setText("Import Complete!")
 
+    def _mark_cancelled(self):
+        self.cancelled = True; self.cancel_btn.setEnabled(False)
+        self._pending_progress = None  # don't let a queued update overwrite "Cancelling…"
+        self.status_lbl.setText("Cancelling…")
+
     def _cancel(self):
         if self.complete:
             self.accept()
         elif askUser("Cancel import?\n\nAlready imported cards will be kept."):
-            self.cancelled = True; self.cancel_btn.setEnabled(False)
-            self.status_lbl.setText("Cancelling…")
+            self._mark_cancelled()
 
     def closeEvent(self, e):
         if self.complete: e.accept()
         elif askUser("Cancel import?\n\nAlready imported cards will be kept."):
-            self.cancelled = True; self.cancel_btn.setEnabled(False)
-            self.status_lbl.setText("Cancelling…"); e.accept()
+            self._mark_cancelled(); e.accept()
         else: e.ignore()
 
 
@@ -1388,6 +2095,30 @@ class ImportProgressDialog(QDialog):
 # MAIN IMPORT WORKFLOW
 # ============================================================================
 
+def add_notes_batched(pending: List[Tuple[Note, int]]) -> Tuple[int, List[str]]:
+    """Add (note, deck_id) pairs, returning (added, error messages).
+
+    Uses a single add_notes call when the collection supports it, so a page of
+    cards is one transaction instead of one per note. If that call fails the
+    whole batch is rolled back, so retry per note to keep the good cards.
+    """
+    if not pending:
+        return 0, []
+    if AddNoteRequest is not None and hasattr(mw.col, "add_notes"):
+        try:
+            mw.col.add_notes([AddNoteRequest(note=n, deck_id=did) for n, did in pending])
+            return len(pending), []
+        except Exception as e:
+            log_error("add_notes", e, with_traceback=False)
+    added, errors = 0, []
+    for note, deck_id in pending:
+        try:
+            mw.col.add_note(note, deck_id); added += 1
+        except Exception as e:
+            errors.append(f"Card error: {e}")
+    return added, errors
+
+
 def run_importer():
     api_key    = CONFIG.get("api_key", "").strip()
     model_name = CONFIG.get("model", "gemini-2.5-flash-preview-05-20").strip()
@@ -1443,14 +2174,15 @@ def run_importer():
     )
     if not file_paths: return
 
+    # Checks are I/O-bound (stat + header read), so overlap them for big selections
+    # Non-strict mode skips the header read; a bad file then fails at upload instead
+    strict = bool(CONFIG.get("strict_image_validation", False))
     valid_files, invalid_files = [], []
-    for fp in file_paths:
-        ext = os.path.splitext(fp)[1].lower()
-        if ext not in SUPPORTED_IMAGE_FORMATS:
-            invalid_files.append((os.path.basename(fp), f"Unsupported: {ext}")); continue
-        ok2, msg2 = validate_image_file(fp)
-        if ok2: valid_files.append(fp)
-        else:   invalid_files.append((os.path.basename(fp), msg2))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=VALIDATE_WORKERS) as vpool:
+        results = vpool.map(functools.partial(validate_image_file, strict=strict), file_paths)
+        for fp, (ok2, msg2) in zip(file_paths, results):
+            if ok2: valid_files.append(fp)
+            else:   invalid_files.append((os.path.basename(fp), msg2))
 
     if not valid_files:
         lines = "\n".join(f"• {n}: {m}" for n, m in invalid_files[:5])
@@ -1458,8 +2190,7 @@ def run_importer():
         showWarning(f"No valid images found.\n\n{lines}" if invalid_files else "No image files selected.")
         return
 
-    def nat(p): return [int(c) if c.isdigit() else c.lower() for c in re.split(r"(\d+)", p)]
-    valid_files.sort(key=lambda p: nat(os.path.basename(p)))
+    valid_files.sort(key=_natural_sort_key)
 
     confirm = (f"Ready to import:\n\n• Profile: {display}\n• Images: {len(valid_files)}\n"
                f"• Root Deck: {root_deck}\n• Note Type: {anki_model['name']}\n• Model: {model_name}\n")
@@ -1491,27 +2222,75 @@ def run_importer():
             "basic": f"  Front → {fq}\n  Back  → {fa}\n  Extra → {fe or 'N/A'}"}
     prog.add_detail(f"Field Mapping ({fmt.upper()}):\n{maps.get(fmt,'')}")
 
+    # (field_name, slot) per card, in write order: first write wins priority,
+    # later writes append. Unmapped slots are dropped here, once.
+    if fmt == "mcq":
+        write_spec = [(fq, SLOT_QUESTION), (fc, SLOT_CHOICES), (fa, SLOT_ANSWER), (fe, SLOT_EXTRA)]
+    elif fmt == "cloze":
+        write_spec = [(ft, SLOT_TEXT), (fe, SLOT_EXTRA)]
+    else:  # basic
+        write_spec = [(fq, SLOT_QUESTION), (fa, SLOT_ANSWER), (fe, SLOT_EXTRA)]
+    write_spec = [w for w in write_spec if w[0]]
+
     cards_created = files_ok = files_err = 0
-    prev_path = None; error_log = []
+    error_log = []
+    # Raw subtopic -> deck id. Subtopics repeat across cards and pages, so
+    # sanitize and look up (or create) each deck once per import.
+    deck_ids: Dict[str, int] = {}
+
+    # Gemini calls are network-bound, so they run on worker threads in a sliding
+    # window: `window` requests are in flight, and each time a page is consumed the
+    # next one is submitted. Results are consumed here, in file order, because notes
+    # must be added on the main thread. Each page gets the page before it as
+    # context, which is known up front.
+    window = max(1, int(CONFIG.get("gemini_concurrency", GEMINI_MAX_IN_FLIGHT)))
+    cancel_event = threading.Event()
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=window)
+    futures: Dict[int, concurrent.futures.Future] = {}
+
+    def request_page(i: int) -> Optional[Tuple[bool, str]]:
+        if cancel_event.is_set():
+            return None  # queued before Cancel; don't spend a request on it
+        return get_gemini_response(api_key, model_name, valid_files[i],
+                                   valid_files[i - 1] if i else None, prompt=prompt,
+                                   cancel=cancel_event)
+
+    def submit(i: int):
+        if i < len(valid_files) and not cancel_event.is_set():
+            futures[i] = pool.submit(request_page, i)
+
+    for i in range(window):
+        submit(i)
+
+    def await_response(fut) -> Optional[Tuple[bool, str]]:
+        # The only place the import pumps the event loop: progress repaints (via the
+        # dialog's flush timer) and Cancel clicks are handled here, at least once per
+        # file and every 50 ms while the worker waits on the network. None = cancelled
+        while True:
+            QApplication.processEvents()
+            if prog.is_cancelled():
+                return None
+            try:
+                return fut.result(timeout=0.05)
+            except concurrent.futures.TimeoutError:
+                pass
 
     try:
         for idx, fp in enumerate(valid_files):
             if prog.is_cancelled(): break
+            fut = futures.pop(idx)
+            submit(idx + window)  # keep the window full while this page is handled
             fname = os.path.basename(fp)
             prog.update_progress(idx + 1, len(valid_files), f"Processing: {fname}")
 
-            try:
-                anki_fname = mw.col.media.add_file(fp)
-            except Exception:
-                m = f"Failed to add media: {fname}"
-                prog.add_detail(f"❌ {m}"); error_log.append((fname, m)); files_err += 1; continue
-
-            prog.add_detail("🤖 Calling Gemini API…")
-            ok, resp = get_gemini_response(api_key, model_name, fp, prev_path, prompt=prompt)
+            prog.add_detail("🤖 Waiting for Gemini API…")
+            result = await_response(fut)
+            if result is None: break
+            ok, resp = result
             if not ok:
                 m = f"API Error: {resp}"
                 prog.add_detail(f"❌ {m}"); error_log.append((fname, m)); files_err += 1
-                if "403" in resp or "invalid" in resp.lower():
+                if any(marker in resp.lower() for marker in _FATAL_API_ERRORS):
                     showWarning(f"Critical API Error:\n\n{resp}\n\nStopping."); break
                 continue
 
@@ -1520,72 +2299,70 @@ def run_importer():
                 m = "No valid cards in response"
                 prog.add_detail(f"⚠ {m}"); error_log.append((fname, m)); files_err += 1; continue
 
+            # Copy into media only once there are cards to attach it to, so pages
+            # that fail don't leave unused files behind (and don't pay for the copy)
+            try:
+                anki_fname = mw.col.media.add_file(fp)
+            except Exception:
+                m = f"Failed to add media: {fname}"
+                prog.add_detail(f"❌ {m}"); error_log.append((fname, m)); files_err += 1; continue
+
             img_tag = f"<br><br><img src='{anki_fname}'>"
-            fc_count = 0
+            pending: List[Tuple[Note, int]] = []
             for card in cards:
                 try:
-                    sub     = sanitize_deck_name(card.get("subtopic", "") or "General")
-                    deck_id = mw.col.decks.id(f"{root_deck}::{sub}")
+                    raw_sub = card.get("subtopic", "") or "General"
+                    deck_id = deck_ids.get(raw_sub)
+                    if deck_id is None:
+                        sub = sanitize_deck_name(raw_sub)
+                        deck_id = deck_ids[raw_sub] = mw.col.decks.id(f"{root_deck}::{sub}")
                     note    = Note(mw.col, anki_model)
-                    note.note_type()["did"] = deck_id
-
-                    # Build ordered (field_name, content) pairs for this format.
-                    # Order matters: first write wins priority, later writes append.
-                    if fmt == "mcq":
-                        writes = [
-                            (fq, card.get(SLOT_QUESTION, "")),
-                            (fc, card.get(SLOT_CHOICES,  "")),
-                            (fa, card.get(SLOT_ANSWER,   "")),
-                            (fe, card.get(SLOT_EXTRA,    "") + img_tag),
-                        ]
-                    elif fmt == "cloze":
-                        writes = [
-                            (ft, card.get(SLOT_TEXT,  "")),
-                            (fe, card.get(SLOT_EXTRA, "") + img_tag),
-                        ]
-                    else:  # basic
-                        writes = [
-                            (fq, card.get(SLOT_QUESTION, "")),
-                            (fa, card.get(SLOT_ANSWER,   "")),
-                            (fe, card.get(SLOT_EXTRA,    "") + img_tag),
-                        ]
 
                     # Merge: when two slots point to the same Anki field,
                     # append the later content below the earlier one.
                     field_content: Dict[str, str] = {}
-                    for field_name, content in writes:
-                        if not field_name:
-                            continue  # slot not mapped, skip
-                        stripped = content.strip()
-                        if not stripped or stripped == img_tag.strip():
-                            # Only write empty/bare-image content if field not yet touched
-                            if field_name not in field_content:
-                                field_content[field_name] = content
-                        elif field_name in field_content:
-                            existing = field_content[field_name].strip()
-                            sep = "<br><br>" if existing else ""
-                            field_content[field_name] = field_content[field_name] + sep + content
-                        else:
+                    for field_name, slot in write_spec:
+                        content = card.get(slot, "")
+                        if not content.strip():
+                            # Only write empty content if field not yet touched
+                            field_content.setdefault(field_name, content)
+                            continue
+                        prev = field_content.get(field_name)
+                        if prev is None:
                             field_content[field_name] = content
+                        else:
+                            sep = "<br><br>" if prev.strip() else ""
+                            field_content[field_name] = prev + sep + content
+                    if fe:
+                        field_content[fe] += img_tag  # page image always ends the Extra field
 
                     for field_name, content in field_content.items():
                         note[field_name] = content
 
-                    mw.col.add_note(note, deck_id)
-                    fc_count += 1; cards_created += 1
+                    pending.append((note, deck_id))
                 except Exception as e:
                     m = f"Card error: {e}"
                     prog.add_detail(f"⚠ {m}"); error_log.append((fname, m))
 
+            fc_count, add_errors = add_notes_batched(pending)
+            cards_created += fc_count
+            for m in add_errors:
+                prog.add_detail(f"⚠ {m}"); error_log.append((fname, m))
+
             if fc_count > 0:
                 prog.add_detail(f"✓ {fc_count} cards from {fname}"); files_ok += 1
 
-            prev_path = fp
-
     except Exception as e:
         log_error("run_importer", e)
         showWarning(f"Critical error:\n\n{e}\n\nCheck console for details.")
     finally:
+        # Drop requests that haven't started (cancel / critical error); ones already
+        # queued on a worker see cancel_event and return without calling the API
+        cancel_event.set()
+        for f in futures.values(): f.cancel()
+        pool.shutdown(wait=False)
+        _encode_image_cached.cache_clear()
+        _GEMINI_LIMITER.reset()
         prog.mark_complete(); mw.reset()
 
     result = (f"Import Complete!\n\n✓ Profile: {display}\n"
@@ -1659,9 +2436,12 @@ def init_addon():
     if CONFIG.get("validate_api_on_startup", False):
         key = CONFIG.get("api_key", "")
         if key:
-            def _chk():
-                ok, msg = test_api_connection(key, CONFIG.get("model", "gemini-2.5-flash-preview-05-20"))
+            model = CONFIG.get("model", "gemini-2.5-flash-preview-05-20")
+            def _done(fut):
+                ok, msg = fut.result()
                 if not ok: showWarning(f"Gemini API validation failed:\n\n{msg}\n\nCheck Settings.")
+            def _chk():
+                mw.taskman.run_in_background(lambda: test_api_connection(key, model), _done)
             QTimer.singleShot(2000, _chk)
 
 
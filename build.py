@@ -7,6 +7,7 @@ Creates .ankiaddon package for distribution.
 import os
 import zipfile
 import json
+import functools
 from datetime import datetime
 
 # Files to include in the package
@@ -24,12 +25,30 @@ OPTIONAL_FILES = [
     'icon.png'
 ]
 
+# Package files are small, so spend the CPU on the smallest archive
+COMPRESS_LEVEL = 9
+
+# Already-compressed formats gain nothing from deflate; store them as-is
+STORED_EXTENSIONS = ('.png',)
+
+
+@functools.lru_cache(maxsize=None)
+def load_manifest():
+    """Parse manifest.json (once per build)"""
+    with open('manifest.json', 'r', encoding='utf-8') as f:
+        return json.load(f)
+
 
 def get_version():
     """Extract version from manifest.json"""
-    with open('manifest.json', 'r', encoding='utf-8') as f:
-        manifest = json.load(f)
-        return manifest.get('version', '0.0.0')
+    return load_manifest().get('version', '0.0.0')
+
+
+def compress_type(filename):
+    """Zip compression method for a packaged file"""
+    if filename.lower().endswith(STORED_EXTENSIONS):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
 
 
 def create_package():
@@ -42,11 +61,12 @@ def create_package():
     print(f"Output: {output_filename}")
     print("-" * 50)
 
+    # One directory listing answers every existence check below
+    with os.scandir('.') as it:
+        present = {entry.name for entry in it if entry.is_file()}
+
     # Check required files
-    missing = []
-    for filename in INCLUDE_FILES:
-        if not os.path.exists(filename):
-            missing.append(filename)
+    missing = [filename for filename in INCLUDE_FILES if filename not in present]
 
     if missing:
         print("ERROR: Missing required files:")
@@ -55,21 +75,25 @@ def create_package():
         return False
 
     # Create zip file
-    with zipfile.ZipFile(output_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
+    with zipfile.ZipFile(output_filename, 'w', zipfile.ZIP_DEFLATED,
+                         compresslevel=COMPRESS_LEVEL) as zipf:
 
         # Add required files
         for filename in INCLUDE_FILES:
             print(f"Adding: {filename}")
-            zipf.write(filename)
+            zipf.write(filename, compress_type=compress_type(filename))
 
         # Add optional files if they exist
         for filename in OPTIONAL_FILES:
-            if os.path.exists(filename):
+            if filename in present:
                 print(f"Adding: {filename} (optional)")
-                zipf.write(filename)
+                zipf.write(filename, compress_type=compress_type(filename))
             else:
                 print(f"Skipping: {filename} (not found)")
 
+        # Entries are known in memory; no need to reopen the archive to list them
+        contents = [(info.filename, info.file_size) for info in zipf.infolist()]
+
     # Verify package
     file_size = os.path.getsize(output_filename)
     print("-" * 50)
@@ -79,9 +103,8 @@ def create_package():
 
     # List contents
     print("\nPackage contents:")
-    with zipfile.ZipFile(output_filename, 'r') as zipf:
-        for info in zipf.filelist:
-            print(f"  {info.filename} ({info.file_size} bytes)")
+    for name, size in contents:
+        print(f"  {name} ({size} bytes)")
 
     return True
 